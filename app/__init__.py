@@ -5903,6 +5903,14 @@ def admin_settings():
                 db.session.commit()
                 flash('Gambia contact numbers updated successfully.', 'success')
             
+            # Settings changed - drop cached copies used by background senders
+            from app.utils.email_queue import invalidate_email_settings_cache
+            invalidate_email_settings_cache()
+            from app.utils.resend_domain import invalidate_domain_cache
+            invalidate_domain_cache()
+            from app.utils.whatsapp_token import invalidate_whatsapp_settings_cache
+            invalidate_whatsapp_settings_cache()
+            
             return redirect(url_for('admin_settings'))
             
         except Exception as e:
@@ -8637,7 +8645,9 @@ def admin_email_customers():
         log.info("admin_email_customers[POST]: building customer email query")
         # Build query with proper email validation
         # Filter: is_admin == False, email is not None, email != "", email contains "@"
-        base_query = User.query.filter(
+        # Only the email column is selected: the collector reads row.email and
+        # doesn't need full User objects
+        base_query = User.query.with_entities(User.email).filter(
             User.is_admin == False,  # noqa: E712
             User.email.isnot(None),
             User.email != "",
@@ -66,6 +66,11 @@ class ForumFile(db.Model):
     file_size = db.Column(db.Integer)  # Size in bytes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Index for loading a post's files (foreign keys aren't indexed automatically)
+    __table_args__ = (
+        Index('idx_forum_file_post_id', 'post_id'),
+    )
+    
     def __repr__(self):
         return f'<ForumFile {self.id}: {self.filename}>'
 
@@ -81,6 +86,11 @@ class ForumLink(db.Model):
     link_type = db.Column(db.String(50))  # youtube, github, blog, etc.
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Index for loading a post's links (foreign keys aren't indexed automatically)
+    __table_args__ = (
+        Index('idx_forum_link_post_id', 'post_id'),
+    )
+    
     def __repr__(self):
         return f'<ForumLink {self.id}: {self.url}>'
 
@@ -136,10 +146,8 @@ class ForumReaction(db.Model):
     # Relationships
     user = db.relationship('User', backref=db.backref('forum_reactions', lazy=True))
     
-    # Indexes and constraints
+    # Constraints (their unique indexes also serve user/post and user/comment lookups)
     __table_args__ = (
-        Index('idx_forum_reaction_user_post', 'user_id', 'post_id'),
-        Index('idx_forum_reaction_user_comment', 'user_id', 'comment_id'),
         db.UniqueConstraint('user_id', 'post_id', name='uq_user_post_reaction'),
         db.UniqueConstraint('user_id', 'comment_id', name='uq_user_comment_reaction'),
     )
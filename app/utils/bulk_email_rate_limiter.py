@@ -30,7 +30,7 @@ class TokenBucket:
         self.capacity = capacity
         self.refill_rate = refill_rate
         self.tokens = capacity
-        self.last_refill = time.time()
+        self.last_refill = time.monotonic()
         self._lock = threading.Lock()
     
     def consume(self, tokens: float = 1.0) -> bool:
@@ -45,7 +45,7 @@ class TokenBucket:
         """
         with self._lock:
             # Refill tokens based on time elapsed
-            now = time.time()
+            now = time.monotonic()
             elapsed = now - self.last_refill
             self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
             self.last_refill = now
@@ -56,6 +56,16 @@ class TokenBucket:
                 return True
             return False
     
+    def refund(self, tokens: float = 1.0) -> None:
+        """
+        Return tokens taken by consume() that ended up unused.
+        
+        Args:
+            tokens: Number of tokens to give back (default: 1)
+        """
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + tokens)
+    
     def time_until_next_token(self) -> float:
         """
         Calculate time until next token is available.
@@ -114,25 +124,22 @@ class BulkEmailRateLimiter:
         """
         while True:
             with self._lock:
-                # Check both buckets
-                minute_available = self.per_minute_bucket.consume(1.0)
-                hour_available = self.per_hour_bucket.consume(1.0)
-                
-                if minute_available and hour_available:
-                    # Both buckets have tokens, we can proceed
-                    return
+                # Take a token from both buckets or from neither
+                if self.per_minute_bucket.consume(1.0):
+                    if self.per_hour_bucket.consume(1.0):
+                        # Both buckets have tokens, we can proceed
+                        return
+                    # Hourly limit reached: don't burn the per-minute token
+                    self.per_minute_bucket.refund(1.0)
                 
                 # Calculate wait time (use the longer wait)
                 minute_wait = self.per_minute_bucket.time_until_next_token()
                 hour_wait = self.per_hour_bucket.time_until_next_token()
                 wait_time = max(minute_wait, hour_wait)
-                
-                if wait_time > 0:
-                    # Sleep outside the lock to avoid blocking other threads
-                    time.sleep(min(wait_time, 60.0))  # Cap at 60 seconds
-                else:
-                    # Shouldn't happen, but break just in case
-                    return
+            
+            # Sleep outside the lock to avoid blocking other threads
+            if wait_time > 0:
+                time.sleep(min(wait_time, 60.0))  # Cap at 60 seconds
     
     def handle_rate_limit_error(self, retry_count: int) -> float:
         """
@@ -1,6 +0,0 @@
-"""
-Legacy email background module.
-
-All new email sending uses the Resend-based queue in app.utils.email_queue.
-This file is kept only to avoid import errors in older code paths.
-"""
@@ -1,331 +1,850 @@
+import atexit
+import hashlib
+import json
+import logging
 import os
+import queue
+import random
+import re
+import secrets
 import threading
-import uuid
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, Iterable, List, Optional
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from flask import current_app
-import resend
+from flask import has_app_context
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from app.utils.bulk_email_rate_limiter import TokenBucket
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
 
 _DEFAULT_WORKERS = int(os.getenv("EMAIL_WORKERS", "10") or "10")
-EXECUTOR = ThreadPoolExecutor(max_workers=_DEFAULT_WORKERS)
 
-# Simple in-memory status tracking for bulk jobs
-email_status: Dict[str, Dict[str, Any]] = {}
+# ThreadPoolExecutor only starts a worker thread when work is submitted, so
+# these pools cost nothing in processes that never send email.
+# Interactive single emails (receipts, password resets) get their own pool so a
+# long-running bulk job can never starve them.
+EXECUTOR_SINGLE = ThreadPoolExecutor(max_workers=_DEFAULT_WORKERS, thread_name_prefix="mail-single")
+EXECUTOR_BULK = ThreadPoolExecutor(max_workers=max(2, _DEFAULT_WORKERS // 4), thread_name_prefix="mail-bulk")
 
+# Pool for the Resend batch calls of a bulk job. Bulk jobs wait on these
+# futures, so they must not share EXECUTOR_BULK.
+_SEND_CONCURRENCY = int(os.getenv("EMAIL_SEND_CONCURRENCY", "20") or "20")
+EXECUTOR_BATCH = ThreadPoolExecutor(max_workers=_SEND_CONCURRENCY, thread_name_prefix="mail-batch")
 
-def _ensure_resend_config() -> None:
-    """Configure Resend API key from database settings or environment."""
+
+# Upper bound on jobs queued or running across the email executors. The
+# executors' own work queues are unbounded, so this is what keeps a burst of
+# submissions from growing memory without limit.
+_MAX_PENDING = int(os.getenv("EMAIL_MAX_PENDING", "1000") or "1000")
+_SUBMIT_TIMEOUT = float(os.getenv("EMAIL_SUBMIT_TIMEOUT", "5") or "5")
+_PENDING = threading.BoundedSemaphore(_MAX_PENDING)
+
+
+# Client-side cap on Resend API requests per second across all pools (a batch
+# call counts as one request). 0 disables it. The bucket holds at least one
+# token, so a fractional rate such as 0.5 still lets a request through.
+_RATE_LIMIT = float(os.getenv("EMAIL_RATE_LIMIT", "10") or "0")
+_RATE_BUCKET = TokenBucket(capacity=max(1.0, _RATE_LIMIT), refill_rate=_RATE_LIMIT) if _RATE_LIMIT > 0 else None
+
+# A 429 from Resend pauses every sender until this monotonic time, so one
+# rejected request slows the whole process down instead of just its thread.
+_RATE_LIMIT_RETRIES = 3
+_rate_paused_until = 0.0
+
+
+class EmailQueueFull(RuntimeError):
+    """Raised when EMAIL_MAX_PENDING jobs are already queued or running."""
+    pass
+
+
+# Request handlers only put work on this queue; a single dispatcher thread
+# hands it to the executors, so the request path never takes an executor lock.
+_DISPATCH_QUEUE: "queue.SimpleQueue[Tuple[ThreadPoolExecutor, Any, Tuple[Any, ...]]]" = queue.SimpleQueue()
+_dispatcher: Optional[threading.Thread] = None
+_dispatcher_lock = threading.Lock()
+
+
+def _release_pending(_future) -> None:
+    _PENDING.release()
+
+
+def _dispatch_loop() -> None:
+    while True:
+        executor, fn, args = _DISPATCH_QUEUE.get()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            # Executors refuse new work once they are shut down at exit
+            _PENDING.release()
+            continue
+        future.add_done_callback(_release_pending)
+
+
+def _ensure_dispatcher() -> None:
+    """Start the dispatcher thread on first use (and again after a fork)."""
+    global _dispatcher
+    if _dispatcher is not None and _dispatcher.is_alive():
+        return
+    with _dispatcher_lock:
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = threading.Thread(target=_dispatch_loop, name="mail-dispatcher", daemon=True)
+            _dispatcher.start()
+
+
+def _submit(executor: ThreadPoolExecutor, fn, *args) -> None:
+    """Queue `fn` for `executor`, blocking up to _SUBMIT_TIMEOUT for a free slot."""
+    if not _PENDING.acquire(timeout=_SUBMIT_TIMEOUT):
+        raise EmailQueueFull(f"email queue is full ({_MAX_PENDING} pending jobs)")
     try:
-        from app import AppSettings
-        settings = AppSettings.query.first()
-        if settings and settings.resend_api_key:
-            resend.api_key = settings.resend_api_key
-            return
+        _ensure_dispatcher()
+        _DISPATCH_QUEUE.put((executor, fn, args))
     except Exception:
-        pass
-    # Fallback to environment variable
+        _PENDING.release()
+        raise
+
+
+def _shutdown_executors() -> None:
+    # Queued jobs can't finish once the process exits; drop them instead of
+    # starting new sends during interpreter shutdown.
+    for executor in (EXECUTOR_SINGLE, EXECUTOR_BULK, EXECUTOR_BATCH):
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_shutdown_executors)
+
+# Messages per Resend batch call; the /emails/batch endpoint accepts at most 100
+_BATCH_SIZE = max(1, min(100, int(os.getenv("RESEND_BATCH_SIZE", "100") or "100")))
+
+# Minimum seconds between progress log lines of a bulk job
+_PROGRESS_LOG_INTERVAL = 1.0
+
+
+class JobStatus:
+    """Live status of a bulk email job.
+
+    The job's own thread is the only writer and bumps the counters in place,
+    so the hot loop never allocates; readers build a dict snapshot on demand.
+    """
+
+    __slots__ = ("status", "sent", "failed", "total", "skipped", "error", "finished_at")
+
+    def __init__(self, status: str = "queued") -> None:
+        self.status = status
+        self.sent = 0
+        self.failed = 0
+        self.total = 0
+        self.skipped = 0
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+
+    def finish(self, status: str) -> None:
+        """Mark the job completed or failed and start its expiry clock."""
+        self.status = status
+        self.finished_at = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "status": self.status,
+            "sent": self.sent,
+            "failed": self.failed,
+            "total": self.total,
+            "skipped": self.skipped,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+# Simple in-memory status tracking for bulk jobs. Finished jobs are kept for
+# _JOB_STATUS_TTL seconds so the admin UI can still poll them, and at most
+# EMAIL_STATUS_MAX_JOBS entries are kept, oldest finished jobs evicted first.
+email_status: Dict[str, JobStatus] = {}
+_JOB_STATUS_TTL = 24 * 3600
+_MAX_JOB_STATUSES = int(os.getenv("EMAIL_STATUS_MAX_JOBS", "1024") or "1024")
+
+
+def _prune_email_status() -> None:
+    """Make room for a new job; running jobs are never dropped."""
+    cutoff = time.monotonic() - _JOB_STATUS_TTL
+    excess = len(email_status) + 1 - _MAX_JOB_STATUSES
+    # Dicts keep insertion order, so this walks from the oldest job
+    for job_id, stat in list(email_status.items()):
+        if stat.finished_at is None:
+            continue
+        if stat.finished_at < cutoff or excess > 0:
+            email_status.pop(job_id, None)
+            excess -= 1
+
+
+# Resend settings cache (60 seconds TTL). AppSettings rarely changes, so email
+# jobs read it from here instead of querying the database on every send.
+_EMAIL_SETTINGS_TTL = 60
+_email_settings_cache: Optional[Tuple[Optional[str], str, Optional[bool]]] = None
+_email_settings_cache_time = 0.0
+_email_settings_lock = threading.Lock()
+
+
+def invalidate_email_settings_cache() -> None:
+    """Drop the cached Resend settings; call after AppSettings is saved."""
+    global _email_settings_cache
+    with _email_settings_lock:
+        _email_settings_cache = None
+
+
+# USE_DB_EMAIL_SETTINGS=0 makes RESEND_API_KEY/RESEND_FROM_EMAIL authoritative
+# when both are set, so sends never touch the database for settings.
+_USE_DB_EMAIL_SETTINGS = os.getenv("USE_DB_EMAIL_SETTINGS", "1") != "0"
+
+
+def _env_email_settings() -> Optional[Tuple[Optional[str], str, Optional[bool]]]:
     api_key = os.getenv("RESEND_API_KEY")
+    from_email = os.getenv("RESEND_FROM_EMAIL")
+    if not (api_key and from_email):
+        return None
+    if '<' not in from_email:
+        from_email = f"{os.getenv('BUSINESS_NAME', 'Store')} <{from_email}>"
+    return api_key, from_email, True
+
+
+def get_email_settings(app=None) -> Tuple[Optional[str], str, Optional[bool]]:
+    """Return (api_key, from_email, enabled) from database settings or environment.
+
+    `enabled` is AppSettings.resend_enabled, or None when there is no settings
+    row to read it from. With USE_DB_EMAIL_SETTINGS=0 and both environment
+    variables set, the environment is used without querying the database.
+    The result is cached for _EMAIL_SETTINGS_TTL seconds; the lock is only
+    taken on a miss. On a miss outside an app context, `app` is used to push
+    one for the query. Formats the FROM email as "Store <email@domain.com>" if
+    business name is available.
+    """
+    global _email_settings_cache, _email_settings_cache_time
+
+    if not _USE_DB_EMAIL_SETTINGS:
+        env_settings = _env_email_settings()
+        if env_settings is not None:
+            return env_settings
+
+    cached = _email_settings_cache
+    if cached is not None and time.monotonic() - _email_settings_cache_time < _EMAIL_SETTINGS_TTL:
+        return cached
+
+    with _email_settings_lock:
+        cached = _email_settings_cache
+        if cached is not None and time.monotonic() - _email_settings_cache_time < _EMAIL_SETTINGS_TTL:
+            return cached
+
+        api_key = None
+        from_email = None
+        enabled = None
+        loaded = True
+        try:
+            from app import AppSettings
+            ctx = app.app_context() if app is not None and not has_app_context() else nullcontext()
+            with ctx:
+                settings = AppSettings.query.first()
+            if settings:
+                api_key = settings.resend_api_key or None
+                enabled = settings.resend_enabled is not False
+                from_email = settings.resend_from_email
+                if from_email:
+                    # Format with business name if available
+                    business_name = getattr(settings, 'business_name', None) or 'Store'
+                    if business_name and '<' not in from_email:
+                        from_email = f"{business_name} <{from_email}>"
+        except Exception:
+            # Don't cache an environment-only answer caused by a database hiccup
+            loaded = False
+
+        # Fallback to environment variable
+        api_key = api_key or os.getenv("RESEND_API_KEY")
+        if not from_email:
+            # Fallback to environment variable, then default
+            from_email = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
+            business_name = os.getenv("BUSINESS_NAME", "Store")
+            if '<' not in from_email:
+                from_email = f"{business_name} <{from_email}>"
+
+        result = (api_key, from_email, enabled)
+        if loaded:
+            _email_settings_cache = result
+            _email_settings_cache_time = time.monotonic()
+        return result
+
+
+# API key sent with every request; set by _ensure_resend_config() or by
+# send_resend_email(api_key=...). Kept here rather than on the SDK module so
+# importing this module doesn't load the SDK.
+_resend_api_key: Optional[str] = None
+
+
+def _ensure_resend_config(app=None) -> None:
+    """Configure Resend API key from database settings or environment."""
+    global _resend_api_key
+    api_key = get_email_settings(app)[0]
     if api_key:
+        _resend_api_key = api_key
+        # Code that still sends through the SDK relies on its global key, so
+        # keep it in step; the SDK is only imported once mail is actually sent
+        import resend
         resend.api_key = api_key
 
 
-def _get_from_email() -> str:
-    """Get from_email from database settings, with fallback to environment variable.
-    
-    Formats the FROM email as "Store <email@domain.com>" if business name is available.
+def _get_from_email(app=None) -> str:
+    """Get from_email from database settings, with fallback to environment variable."""
+    return get_email_settings(app)[1]
+
+
+_RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com").rstrip("/")
+# (connect, read) seconds: fail fast when Resend is unreachable
+_RESEND_TIMEOUT = (5, 30)
+
+
+def _json_dumps(data: Any) -> bytes:
+    """Serialize a request body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _json_loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# Global session for Resend requests. Reusing it keeps TLS connections alive
+# across sends instead of paying a new handshake per email.
+_resend_session: Optional[requests.Session] = None
+_resend_session_lock = threading.Lock()
+
+
+def _get_resend_session() -> requests.Session:
+    """Get or create the pooled Resend session, sized for the send pools.
+
+    Transient 5xx failures are retried with backoff; 429 is handled by
+    _resend_post so the pause is shared. Retrying POST is safe because bulk
+    sends carry an Idempotency-Key and single sends a per-message one.
     """
-    try:
-        from app import AppSettings
-        settings = AppSettings.query.first()
-        if settings:
-            from_email = settings.resend_from_email
-            if from_email:
-                # Format with business name if available
-                business_name = getattr(settings, 'business_name', None) or 'Store'
-                if business_name and '<' not in from_email:
-                    return f"{business_name} <{from_email}>"
-                return from_email
-    except Exception:
-        pass
-    # Fallback to environment variable, then default
-    from_email = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
-    business_name = os.getenv("BUSINESS_NAME", "Store")
-    if '<' not in from_email:
-        return f"{business_name} <{from_email}>"
-    return from_email
+    global _resend_session
+    if _resend_session is None:
+        with _resend_session_lock:
+            if _resend_session is None:
+                pool_size = max(_DEFAULT_WORKERS, _SEND_CONCURRENCY)
+                session = requests.Session()
+                retry_strategy = Retry(
+                    total=3,
+                    backoff_factor=0.5,  # Exponential backoff: 0.5, 1, 2 seconds
+                    status_forcelist=[500, 502, 503, 504],
+                    allowed_methods=["POST"],
+                    raise_on_status=False,  # Let raise_for_status() report the final response
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry_strategy)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _resend_session = session
+    return _resend_session
 
 
-def _send_single_email_job(app, recipient: str, subject: str, html_body: str, metadata: Optional[Dict[str, Any]]) -> None:
-    with app.app_context():
-        log = current_app.logger
-        thread_name = threading.current_thread().name
-        log.info(
-            "email_queue._send_single_email_job: start",
-            extra={
-                "recipient": recipient,
-                "thread": thread_name,
-            },
+def _close_resend_session() -> None:
+    if _resend_session is not None:
+        _resend_session.close()
+
+
+atexit.register(_close_resend_session)
+
+
+def _idempotency_key(*parts: str) -> str:
+    """Derive a Resend Idempotency-Key: 32 hex chars of BLAKE2b over the parts.
+
+    Bulk sends use (job_id, email) for an individual message and
+    (job_id, "batch", recipients...) for a batch call, so repeating the same
+    request for the same job is deduplicated by Resend for 24 hours.
+    """
+    return hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _pause_sending(seconds: float) -> None:
+    global _rate_paused_until
+    _rate_paused_until = max(_rate_paused_until, time.monotonic() + seconds)
+
+
+def _retry_after_seconds(response: requests.Response, attempt: int) -> float:
+    """Seconds to wait after a 429: Retry-After if given, else jittered backoff."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return min(30.0, 2.0 ** attempt) + random.uniform(0, 0.5)
+
+
+def _wait_for_rate_limit() -> None:
+    """Block until any 429 pause is over and the token bucket allows a request."""
+    delay = _rate_paused_until - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    if _RATE_BUCKET is None:
+        return
+    while not _RATE_BUCKET.consume(1.0):
+        time.sleep(_RATE_BUCKET.time_until_next_token())
+
+
+_request_headers_cache: Tuple[Optional[str], Dict[str, str]] = (None, {})
+
+
+def _request_headers() -> Dict[str, str]:
+    """Return the shared request headers, rebuilt only when the API key changes."""
+    global _request_headers_cache
+    api_key = _resend_api_key
+    cached_key, headers = _request_headers_cache
+    if cached_key != api_key or not headers:
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+        }
+        _request_headers_cache = (api_key, headers)
+    return headers
+
+
+def _resend_post(
+    path: str,
+    payload: Any,
+    idempotency_key: Optional[str] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> Any:
+    """POST a JSON body to the Resend API and return the decoded response.
+
+    Bypasses the SDK so the body is serialized once with the fastest available
+    encoder (or sent as-is when payload is already encoded bytes) over the
+    shared keep-alive session. A 429 pauses all
+    senders for its Retry-After and is retried up to _RATE_LIMIT_RETRIES
+    times. Raises requests.HTTPError on a non-2xx response.
+    """
+    headers = _request_headers()
+    if idempotency_key or extra_headers:
+        headers = {**headers, **(extra_headers or {})}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+    body = payload if isinstance(payload, bytes) else _json_dumps(payload)
+    session = _get_resend_session()
+    for attempt in range(_RATE_LIMIT_RETRIES + 1):
+        _wait_for_rate_limit()
+        response = session.post(
+            f"{_RESEND_API_URL}{path}",
+            data=body,
+            headers=headers,
+            timeout=_RESEND_TIMEOUT,
         )
+        if response.status_code != 429 or attempt == _RATE_LIMIT_RETRIES:
+            break
+        delay = _retry_after_seconds(response, attempt)
+        logger.warning("email_queue._resend_post: rate limited by Resend, pausing sends for %.1fs", delay)
+        _pause_sending(delay)
+    response.raise_for_status()
+    return _json_loads(response.content) if response.content else None
+
+
+def send_resend_email(
+    payload: Dict[str, Any],
+    idempotency_key: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> Any:
+    """Send one payload through the Resend API and return the decoded response.
+
+    Uses the shared keep-alive session, rate limiter and retries; raises on
+    failure. api_key, when given, becomes the key for this and later
+    requests; otherwise the key loaded by _ensure_resend_config() is used.
+    """
+    global _resend_api_key
+    if api_key:
+        _resend_api_key = api_key
+    return _resend_post("/emails", payload, idempotency_key)
 
-        try:
-            _ensure_resend_config()
-            from_email = _get_from_email()
 
-            # Use official Resend API format: "to" must be a list
-            payload: Dict[str, Any] = {
-                "from": from_email,
-                "to": [recipient],  # Resend API requires "to" as a list
-                "subject": subject,
-                "html": html_body or "",
-            }
-            if metadata:
-                payload["headers"] = {"X-Metadata": str(metadata)}
+def _metadata_header(metadata: Dict[str, Any]) -> str:
+    """Encode metadata for the X-Metadata header as compact, ASCII-only JSON."""
+    return json.dumps(metadata, separators=(",", ":"), default=str)
 
-            resend.Emails.send(payload)
 
-            log.info(
-                "email_queue._send_single_email_job: success",
-                extra={"recipient": recipient, "thread": thread_name},
-            )
+def _build_payload(from_email: str, subject: str, html_body: str, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the Resend payload fields shared by every recipient of a message."""
+    payload: Dict[str, Any] = {
+        "from": from_email,
+        "subject": subject,
+        "html": html_body or "",
+    }
+    if metadata:
+        payload["headers"] = {"X-Metadata": _metadata_header(metadata)}
+    return payload
+
+
+def _encode_message_prefix(base_payload: Dict[str, Any]) -> bytes:
+    """Encode the shared payload fields once, leaving the JSON object open.
+
+    _encode_message() appends each recipient to this prefix, so a large html
+    body is serialized once per job instead of once per recipient.
+    """
+    return _json_dumps(base_payload)[:-1]
+
+
+def _encode_message(prefix: bytes, recipient: str) -> bytes:
+    # Resend API requires "to" as a list
+    return prefix + b',"to":' + _json_dumps([recipient]) + b"}"
+
+
+def _is_sent(response: Any) -> bool:
+    """Resend returns an object or dict carrying an 'id' on success."""
+    return bool(response) and (hasattr(response, "id") or (isinstance(response, dict) and bool(response.get("id"))))
+
+
+def _chunk_result(recipient: str, response: Any) -> Tuple[str, bool, Optional[str]]:
+    if _is_sent(response):
+        return recipient, True, None
+    return recipient, False, f"Unexpected response: {response}"
+
+
+# In permissive mode Resend sends the valid messages of a batch and reports the
+# invalid ones in an "errors" list of {index, message}, instead of rejecting
+# the whole batch because of one bad address.
+_BATCH_HEADERS = {"x-batch-validation": "permissive"}
+
+# Statuses for which Resend rejected the whole batch request without sending
+# any of it (malformed or invalid request)
+_BATCH_REJECTED_STATUSES = (400, 422)
+
+
+def _send_resend_chunk(job_id: str, prefix: bytes, recipients: List[str]) -> List[Tuple[str, bool, Optional[str]]]:
+    """Send one message per recipient (up to _BATCH_SIZE) with one Resend batch call.
+
+    prefix comes from _encode_message_prefix(); the batch body is assembled
+    from it without re-encoding the shared fields. Returns one
+    (recipient, sent, error) tuple per recipient. Recipients that
+    Resend rejects are reported from the batch response's errors. Only a batch
+    Resend rejected outright (_BATCH_REJECTED_STATUSES) falls back to
+    individual sends; after a timeout, 5xx or 429 the batch may have gone out,
+    so it is repeated once under the same idempotency key and otherwise the
+    chunk is reported failed.
+    """
+    messages = [_encode_message(prefix, recipient) for recipient in recipients]
+    if len(messages) == 1:
+        # A lone message (typically the job's tail) goes to the plain endpoint
+        return _send_chunk_individually(job_id, recipients, messages)
+    body = b"[" + b",".join(messages) + b"]"
+    key = _idempotency_key(job_id, "batch", *recipients)
+    batch_error: Optional[Exception] = None
+    for _attempt in range(2):
+        try:
+            response = _resend_post("/emails/batch", body, key, _BATCH_HEADERS)
+            batch_error = None
+            break
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code in _BATCH_REJECTED_STATUSES:
+                # Nothing in the batch was sent, so each message can be tried on its own
+                return _send_chunk_individually(job_id, recipients, messages)
+            batch_error = exc
         except Exception as exc:
-            log.error(
-                f"email_queue._send_single_email_job: failed to send email to {recipient}: {exc}",
-                exc_info=True,
-            )
+            batch_error = exc
+    if batch_error is not None:
+        return [(recipient, False, str(batch_error)) for recipient in recipients]
+
+    # The batch was accepted; never resend it individually, that could duplicate mail.
+    data = response.get("data") if isinstance(response, dict) else getattr(response, "data", None)
+    errors = response.get("errors") if isinstance(response, dict) else getattr(response, "errors", None)
+    # "data" only holds the ids of accepted messages, in request order
+    rejected = {error.get("index"): error.get("message") for error in errors or [] if isinstance(error, dict)}
+    ids = iter(data or [])
+    return [
+        (recipient, False, rejected[index] or "Rejected by Resend")
+        if index in rejected
+        else _chunk_result(recipient, next(ids, None))
+        for index, recipient in enumerate(recipients)
+    ]
+
+
+def _send_chunk_individually(
+    job_id: str,
+    recipients: List[str],
+    messages: List[bytes],
+) -> List[Tuple[str, bool, Optional[str]]]:
+    results: List[Tuple[str, bool, Optional[str]]] = []
+    for recipient, message in zip(recipients, messages):
+        try:
+            response = _resend_post("/emails", message, _idempotency_key(job_id, recipient))
+            results.append(_chunk_result(recipient, response))
+        except Exception as exc:
+            results.append((recipient, False, str(exc)))
+    return results
 
 
-def _send_bulk_email_job(
+# One "local@domain.tld" address without spaces, surrounding whitespace allowed
+_match_email = re.compile(r"\A\s*[^@\s]+@[^@\s]+\.[^@\s]+\s*\Z").match
+
+
+def _is_valid_email(email: Any) -> bool:
+    """Check if email is valid: a string holding a single local@domain.tld address."""
+    return isinstance(email, str) and _match_email(email) is not None
+
+
+# Rows fetched per round-trip when streaming a recipients query
+_QUERY_FETCH_SIZE = 1000
+
+
+def _stream_query_emails(query) -> Tuple[Iterable[Any], Any]:
+    """Return (rows, get_addr) streaming the addresses of a recipients query.
+
+    When the query's entity has an ``email`` column only that column is
+    selected, so no ORM objects are built; otherwise full rows are streamed
+    and ``email`` is read from each one.
+    """
+    from operator import itemgetter
+    from sqlalchemy.orm.attributes import QueryableAttribute
+
+    query = query.execution_options(stream_results=True)
+    descriptions = query.column_descriptions
+    entity = descriptions[0].get("entity") if len(descriptions) == 1 else None
+    email_column = getattr(entity, "email", None) if entity is not None else None
+    if isinstance(email_column, QueryableAttribute):
+        return query.with_entities(email_column).yield_per(_QUERY_FETCH_SIZE), itemgetter(0)
+    return query.yield_per(_QUERY_FETCH_SIZE), lambda row: getattr(row, "email", None)
+
+
+def _record_email(record: Any) -> Any:
+    """Address of a recipient record: the record itself if it is a string, else its ``email``."""
+    return record if isinstance(record, str) else getattr(record, "email", None)
+
+
+def _filter_valid_emails(records: Iterable[Any]) -> Iterator[str]:
+    """Lazily yield the stripped valid addresses of `records` (strings or objects with ``email``)."""
+    return (
+        addr.strip()
+        for addr in map(_record_email, records)
+        if isinstance(addr, str) and _match_email(addr)
+    )
+
+
+# Keys of single emails queued or being sent, so an identical message queued
+# again while the first is still in flight (a double submit) is sent once.
+_inflight_singles = set()
+_inflight_lock = threading.Lock()
+
+
+def _send_single_email_job(
     app,
-    recipients_source: Any,
+    recipient: str,
     subject: str,
     html_body: str,
     metadata: Optional[Dict[str, Any]],
-    job_id: str,
+    inflight_key: str,
 ) -> None:
-    with app.app_context():
-        log = current_app.logger
-        thread_name = threading.current_thread().name
-
-        email_status[job_id] = {
-            "status": "running",
-            "sent": 0,
-            "failed": 0,
-            "total": 0,
-        }
+    # Resend needs no Flask state; the app is only used to load settings
+    # from the database when the settings cache is cold.
+    # The thread name is already on every LogRecord as threadName; passing it
+    # as extra={"thread": ...} would clash with the reserved "thread" field.
+    log = logger
+    log.debug(
+        "email_queue._send_single_email_job: start",
+        extra={"recipient": recipient},
+    )
+
+    try:
+        _ensure_resend_config(app)
+        from_email = _get_from_email(app)
+
+        # Use official Resend API format: "to" must be a list
+        payload = _build_payload(from_email, subject, html_body, metadata)
+        payload["to"] = [recipient]
+
+        # A random key is enough here: it only has to stay the same across
+        # the session's retries of this one request
+        send_resend_email(payload, secrets.token_hex(16))
 
         log.info(
-            "email_queue._send_bulk_email_job: start",
-            extra={
-                "job_id": job_id,
-                "thread": thread_name,
-            },
+            "email_queue._send_single_email_job: success",
+            extra={"recipient": recipient},
+        )
+    except Exception as exc:
+        log.error(
+            "email_queue._send_single_email_job: failed to send email to %s: %s",
+            recipient, exc,
+            exc_info=True,
         )
+    finally:
+        with _inflight_lock:
+            _inflight_singles.discard(inflight_key)
+
+
+def _send_bulk_email_job(
+    app,
+    recipients_source: Any,
+    subject: str,
+    html_body: str,
+    metadata: Optional[Dict[str, Any]],
+    job_id: str,
+) -> None:
+    # An app context is only held for the whole job when recipients are a
+    # SQLAlchemy query, whose session must stay open while it is streamed.
+    # Address lists need Flask only to load settings on a cold cache.
+    ctx = app.app_context() if hasattr(recipients_source, "yield_per") else nullcontext()
+    with ctx:
+        # job_id is bound once for every record of this job; the thread name is
+        # already on each LogRecord as threadName, so it is not passed as extra.
+        log = logging.LoggerAdapter(logger, {"job_id": job_id})
+        debug_enabled = log.isEnabledFor(logging.DEBUG)
+
+        stat = email_status.get(job_id)
+        if stat is None:
+            stat = email_status[job_id] = JobStatus()
+        stat.status = "running"
+
+        log.info("email_queue._send_bulk_email_job: start")
 
         try:
-            _ensure_resend_config()
-            from_email = _get_from_email()
-            log.info(f"email_queue._send_bulk_email_job: Resend configured, from_email={from_email}")
+            _ensure_resend_config(app)
+            from_email = _get_from_email(app)
+            log.info("email_queue._send_bulk_email_job: Resend configured, from_email=%s", from_email)
 
-            sent = 0
-            failed = 0
             total = 0
             skipped = 0
-            valid_emails = []
-
-            # Helper function to validate email
-            def is_valid_email(email: str) -> bool:
-                """Check if email is valid: not None, not empty, contains @"""
-                if not email:
-                    return False
-                if not isinstance(email, str):
-                    return False
-                email = email.strip()
-                if not email:
-                    return False
-                if "@" not in email:
-                    return False
-                return True
-
-            # Stream recipients and collect valid emails
-            log.info("email_queue._send_bulk_email_job: collecting valid customer emails")
-            try:
+            duplicates = 0
+
+            def iter_valid_emails():
+                """Yield valid addresses one at a time; invalid ones only bump `skipped`."""
+                nonlocal skipped
                 if hasattr(recipients_source, "yield_per"):
-                    # SQLAlchemy query - use yield_per for efficient streaming
+                    # SQLAlchemy query - stream it through a server-side cursor
                     log.info("email_queue._send_bulk_email_job: Using SQLAlchemy query with yield_per")
-                    iterator = recipients_source.yield_per(100)
-                    for user in iterator:
-                        try:
-                            addr = getattr(user, "email", None)
-                            if is_valid_email(addr):
-                                valid_emails.append(addr)
-                            else:
-                                skipped += 1
-                                log.warning(f"email_queue._send_bulk_email_job: skipping invalid email: {addr}")
-                        except Exception as user_exc:
-                            skipped += 1
-                            log.warning(
-                                f"email_queue._send_bulk_email_job: error processing user record: {user_exc}",
-                                exc_info=True,
-                            )
+                    records, get_addr = _stream_query_emails(recipients_source)
                 else:
-                    # List or other iterable of email addresses
+                    # Iterable of addresses, or of rows/objects carrying an "email"
                     log.info("email_queue._send_bulk_email_job: Iterating over email address list")
-                    for addr in recipients_source:
-                        try:
-                            if is_valid_email(addr):
-                                valid_emails.append(addr)
-                            else:
-                                skipped += 1
-                                log.warning(f"email_queue._send_bulk_email_job: skipping invalid email: {addr}")
-                        except Exception as addr_exc:
-                            skipped += 1
-                            log.warning(
-                                f"email_queue._send_bulk_email_job: error processing email address: {addr_exc}",
-                                exc_info=True,
-                            )
-            except Exception as collection_exc:
-                log.error(
-                    f"email_queue._send_bulk_email_job: failed to collect recipient emails: {collection_exc}",
-                    exc_info=True,
-                    extra={"job_id": job_id, "thread": thread_name},
-                )
-                email_status[job_id] = {
-                    "status": "failed",
-                    "sent": 0,
-                    "failed": 0,
-                    "total": 0,
-                }
-                return
-
-            total_valid = len(valid_emails)
-            log.info(f"email_queue._send_bulk_email_job: Valid customer emails: {total_valid}, Skipped: {skipped}")
-
-            if total_valid == 0:
-                log.warning("email_queue._send_bulk_email_job: No valid emails to send")
-                email_status[job_id] = {
-                    "status": "completed",
-                    "sent": 0,
-                    "failed": 0,
-                    "total": 0,
-                }
-                return
-
-            # Update status with total count before starting
-            email_status[job_id] = {
-                "status": "running",
-                "sent": 0,
-                "failed": 0,
-                "total": total_valid,
-            }
-
-            # Send emails individually to each customer (privacy requirement)
-            # This works with restricted Resend API keys and ensures individual delivery
-            log.info(f"email_queue._send_bulk_email_job: Sending {total_valid} emails individually to customers")
-            
-            for idx, email in enumerate(valid_emails, start=1):
-                total += 1
-                try:
-                    # Ensure Resend is configured for each email (in case of long-running job)
-                    _ensure_resend_config()
-                    
-                    # Build payload for individual email
-                    payload: Dict[str, Any] = {
-                        "from": from_email,
-                        "to": [email],  # Resend API requires "to" as a list
-                        "subject": subject,
-                        "html": html_body or "",
-                    }
-                    if metadata:
-                        payload["headers"] = {"X-Metadata": str(metadata)}
-
-                    # Send email using Resend API
-                    response = resend.Emails.send(payload)
-                    
-                    # Check if send was successful
-                    # Resend API returns an object with 'id' field on success
-                    if response and (hasattr(response, 'id') or (isinstance(response, dict) and response.get('id'))):
-                        sent += 1
-                        log.info(
-                            f"email_queue._send_bulk_email_job: Successfully sent to: {email} ({idx}/{total_valid})",
-                            extra={
-                                "job_id": job_id,
-                                "recipient": email,
-                                "thread": thread_name,
-                                "progress": f"{idx}/{total_valid}",
-                            },
+                    records = recipients_source
+                    get_addr = _record_email
+                for record in records:
+                    try:
+                        addr = get_addr(record)
+                    except Exception as record_exc:
+                        skipped += 1
+                        log.warning(
+                            "email_queue._send_bulk_email_job: error processing recipient record: %s",
+                            record_exc,
+                            exc_info=True,
                         )
+                        continue
+                    if _is_valid_email(addr):
+                        yield addr.strip()
                     else:
-                        # Response doesn't indicate success
-                        failed += 1
-                        log.error(
-                            f"email_queue._send_bulk_email_job: Unexpected response when sending to: {email} - {response}",
-                            extra={"job_id": job_id, "recipient": email, "thread": thread_name},
+                        skipped += 1
+
+            # Fields shared by every message are encoded once; only "to" varies
+            prefix = _encode_message_prefix(_build_payload(from_email, subject, html_body, metadata))
+
+            # Recipients are streamed straight into chunks of _BATCH_SIZE for Resend's
+            # batch endpoint, so at most a few chunks are held in memory no matter how
+            # large the audience is. Every message still has a single recipient
+            # (privacy requirement). Chunks are fanned out over EXECUTOR_BATCH with a
+            # bounded window of in-flight futures; counters are only touched from this
+            # job thread.
+            log.info(
+                "email_queue._send_bulk_email_job: Streaming recipients in batches of %d (concurrency=%d)",
+                _BATCH_SIZE, _SEND_CONCURRENCY,
+            )
+
+            last_progress_log = time.monotonic()
+
+            def record_results(done_futures) -> None:
+                nonlocal total, last_progress_log
+                for future in done_futures:
+                    for email, ok, error in future.result():
+                        total += 1
+                        if ok:
+                            stat.sent += 1
+                            if debug_enabled:
+                                log.debug(
+                                    "email_queue._send_bulk_email_job: Successfully sent to: %s (%d/%d)",
+                                    email, total, stat.total,
+                                )
+                        else:
+                            stat.failed += 1
+                            log.error(
+                                "email_queue._send_bulk_email_job: Error sending to: %s (%d/%d) - %s",
+                                email, total, stat.total, error,
+                            )
+
+                    # Log progress at most once per _PROGRESS_LOG_INTERVAL, checked per chunk
+                    now = time.monotonic()
+                    if now - last_progress_log >= _PROGRESS_LOG_INTERVAL:
+                        last_progress_log = now
+                        log.info(
+                            "email_queue._send_bulk_email_job: Progress update - Sent: %d, Failed: %d, Total: %d/%d",
+                            stat.sent, stat.failed, total, stat.total,
                         )
-                        
-                except Exception as individual_error:
-                    failed += 1
-                    error_msg = str(individual_error)
-                    log.error(
-                        f"email_queue._send_bulk_email_job: Error sending to: {email} ({idx}/{total_valid}) - {error_msg}",
-                        exc_info=True,
-                        extra={
-                            "job_id": job_id,
-                            "recipient": email,
-                            "thread": thread_name,
-                            "progress": f"{idx}/{total_valid}",
-                        },
-                    )
-                    # Continue to next email - don't let individual failures block others
-                
-                # Update status periodically (every 10 emails or at the end)
-                if total % 10 == 0 or idx == total_valid:
-                    email_status[job_id] = {
-                        "status": "running",
-                        "sent": sent,
-                        "failed": failed,
-                        "total": total,
-                    }
-                    log.info(
-                        f"email_queue._send_bulk_email_job: Progress update - Sent: {sent}, Failed: {failed}, Total: {total}/{total_valid}",
-                        extra={
-                            "job_id": job_id,
-                            "sent": sent,
-                            "failed": failed,
-                            "total": total,
-                            "progress": f"{idx}/{total_valid}",
-                        },
-                    )
-
-            email_status[job_id] = {
-                "status": "completed",
-                "sent": sent,
-                "failed": failed,
-                "total": total,
-            }
+
+            max_in_flight = _SEND_CONCURRENCY * 2
+            pending = set()
+            is_address_list = isinstance(recipients_source, (list, tuple))
+            if is_address_list:
+                # Lists and tuples (of addresses or of records with an "email") are
+                # filtered by one generator expression instead of the per-record generator,
+                # and without copying the list
+                log.info("email_queue._send_bulk_email_job: Filtering email address list")
+                recipients = _filter_valid_emails(recipients_source)
+            else:
+                recipients = iter_valid_emails()
+
+            def unique_emails(addresses):
+                """Drop repeated addresses (case-insensitive) so nobody is mailed twice."""
+                nonlocal duplicates
+                seen = set()
+                for addr in addresses:
+                    key = addr.lower()
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                    yield addr
+
+            recipients = unique_emails(recipients)
+            while True:
+                chunk = list(islice(recipients, _BATCH_SIZE))
+                if not chunk:
+                    break
+                # stat.total grows as recipients are streamed in
+                stat.total += len(chunk)
+                pending.add(EXECUTOR_BATCH.submit(_send_resend_chunk, job_id, prefix, chunk))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    record_results(done)
+
+            record_results(as_completed(pending))
+            if is_address_list:
+                skipped = len(recipients_source) - total - duplicates
+
+            if total == 0:
+                log.warning("email_queue._send_bulk_email_job: No valid emails to send (skipped: %d)", skipped)
+
+            stat.total = total
+            stat.skipped = skipped
+            stat.finish("completed")
 
             log.info(
-                f"email_queue._send_bulk_email_job: finished - Total: {total}, Sent: {sent}, Failed: {failed}, Skipped: {skipped}",
-                extra={
-                    "job_id": job_id,
-                    "thread": thread_name,
-                    "sent": sent,
-                    "failed": failed,
-                    "total": total,
-                    "skipped": skipped,
-                },
+                "email_queue._send_bulk_email_job: finished - Total: %d, Sent: %d, Failed: %d, Skipped: %d, Duplicates: %d",
+                total, stat.sent, stat.failed, skipped, duplicates,
             )
         except Exception as exc:
-            current = email_status.get(job_id, {"sent": 0, "failed": 0, "total": 0})
-            email_status[job_id] = {
-                "status": "failed",
-                "sent": current.get("sent", 0),
-                "failed": current.get("failed", 0),
-                "total": current.get("total", 0),
-            }
+            stat.finish("failed")
             log.error(
-                f"email_queue._send_bulk_email_job: unrecoverable error for job {job_id}: {exc}",
+                "email_queue._send_bulk_email_job: unrecoverable error for job %s: %s",
+                job_id, exc,
                 exc_info=True,
             )
 
@@ -338,7 +857,29 @@ def queue_single_email(
     metadata: Optional[Dict[str, Any]] = None,
 ) -> None:
     app_obj = app
-    EXECUTOR.submit(_send_single_email_job, app_obj, recipient, subject, html_body, metadata)
+    # Metadata is part of the key: the same content sent with other metadata
+    # (say, for another order) is a different email, not a double submit
+    metadata_key = json.dumps(metadata, sort_keys=True, default=str) if metadata else ""
+    inflight_key = _idempotency_key(recipient, subject or "", html_body or "", metadata_key)
+    with _inflight_lock:
+        if inflight_key in _inflight_singles:
+            app.logger.info("email_queue.queue_single_email: identical email to %s already queued, skipping", recipient)
+            return
+        _inflight_singles.add(inflight_key)
+    submitted = False
+    try:
+        _submit(EXECUTOR_SINGLE, _send_single_email_job, app_obj, recipient, subject, html_body, metadata, inflight_key)
+        submitted = True
+    except EmailQueueFull as exc:
+        # Single sends are fire-and-forget like their failures inside the job:
+        # log and drop rather than failing the caller's request.
+        app.logger.error("email_queue.queue_single_email: dropping email to %s: %s", recipient, exc)
+    finally:
+        # The job releases the key once it has run; if it was never queued,
+        # release it here or identical emails would be skipped forever
+        if not submitted:
+            with _inflight_lock:
+                _inflight_singles.discard(inflight_key)
 
 
 def queue_bulk_email(
@@ -350,36 +891,46 @@ def queue_bulk_email(
 ) -> str:
     """Queue a bulk email job for background execution.
     
+    Jobs and their status live in this process only and are lost on restart.
+    Campaigns that must be tracked in the database should go through
+    app.services.bulk_email_orchestrator.BulkEmailOrchestrator instead, whose
+    BulkEmailJob rows are shared by every worker.
+    
     Args:
         app: Flask application instance
-        recipients: SQLAlchemy query or list of email addresses
+        recipients: SQLAlchemy query or list of email addresses. For a query,
+            filter out empty addresses in SQL, e.g.
+            ``User.query.with_entities(User.email).filter(User.email.isnot(None), User.email != "")``,
+            so those rows never reach Python.
         subject: Email subject line
         html_body: HTML email body
         metadata: Optional metadata dict to include in email headers
         
     Returns:
         job_id: Unique identifier for tracking this email job
+
+    Raises:
+        EmailQueueFull: if no slot frees up within EMAIL_SUBMIT_TIMEOUT seconds;
+            the job is then recorded as failed, so get_email_job_status() still
+            reports it.
     """
     app_obj = app
-    job_id = str(uuid.uuid4())
+    job_id = secrets.token_hex(8)
     
     # Initialize job status before submitting
-    email_status[job_id] = {
-        "status": "queued",
-        "sent": 0,
-        "failed": 0,
-        "total": 0,
-    }
+    _prune_email_status()
+    stat = email_status[job_id] = JobStatus()
     
     try:
-        # Submit job to thread pool executor
-        future = EXECUTOR.submit(_send_bulk_email_job, app_obj, recipients, subject, html_body, metadata, job_id)
+        # Hand the job to the dispatcher thread
+        _submit(EXECUTOR_BULK, _send_bulk_email_job, app_obj, recipients, subject, html_body, metadata, job_id)
         
         # Log job submission (don't wait for result)
         try:
             log = app.logger
             log.info(
-                f"email_queue.queue_bulk_email: Job {job_id} queued successfully",
+                "email_queue.queue_bulk_email: Job %s queued successfully",
+                job_id,
                 extra={"job_id": job_id},
             )
         except Exception:
@@ -388,17 +939,13 @@ def queue_bulk_email(
         return job_id
     except Exception as exc:
         # If job submission fails, mark as failed immediately
-        email_status[job_id] = {
-            "status": "failed",
-            "sent": 0,
-            "failed": 0,
-            "total": 0,
-            "error": str(exc),
-        }
+        stat.finish("failed")
+        stat.error = str(exc)
         try:
             log = app.logger
             log.error(
-                f"email_queue.queue_bulk_email: Failed to queue job {job_id}: {exc}",
+                "email_queue.queue_bulk_email: Failed to queue job %s: %s",
+                job_id, exc,
                 exc_info=True,
                 extra={"job_id": job_id},
             )
@@ -408,6 +955,12 @@ def queue_bulk_email(
 
 
 def get_email_job_status(job_id: str) -> Optional[Dict[str, Any]]:
-    return email_status.get(job_id)
+    """Return the status dict of a bulk job, or None if the id is unknown.
+
+    Job ids are 16 hex characters (64 random bits), plenty to keep ids of the
+    jobs held in this process from colliding.
+    """
+    stat = email_status.get(job_id)
+    return stat.to_dict() if stat is not None else None
 
 
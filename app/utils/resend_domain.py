@@ -4,10 +4,16 @@ Utility functions for Resend domain verification.
 This module provides functions to check if email domains are verified in Resend.
 Only the FROM email domain needs to be verified - recipient domains can be anything.
 """
-import os
-from typing import Optional, Tuple
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 from flask import current_app
-import resend
+
+
+# Domain part of an address: everything after the last "@", ignoring trailing
+# spaces and the closing ">" of a "Name <user@domain>" address
+_EMAIL_DOMAIN_RE = re.compile(r"@([^@\s>]+)>?\s*$")
 
 
 def extract_domain_from_email(email: str) -> Optional[str]:
@@ -20,12 +26,97 @@ def extract_domain_from_email(email: str) -> Optional[str]:
     Returns:
         Domain name (e.g., "example.com") or None if invalid
     """
-    if not email or "@" not in email:
-        return None
-    try:
-        return email.split("@", 1)[1].strip().lower()
-    except (IndexError, AttributeError):
+    if not email or not isinstance(email, str):
         return None
+    match = _EMAIL_DOMAIN_RE.search(email)
+    return match.group(1).lower() if match else None
+
+
+# Resend domain status cache, keyed by API key:
+# api_key -> (fetched_at, {domain_name_lower: status} or the _DomainListError
+# Resend answered with). A verified domain is trusted for DOMAIN_CACHE_TTL; any
+# other answer only for DOMAIN_PENDING_CACHE_TTL, so a domain verified in
+# Resend shows up quickly.
+_domain_status_cache: Dict[str, Tuple[float, Any]] = {}
+_domain_cache_lock = threading.Lock()
+DOMAIN_CACHE_TTL = 300  # 5 minutes in seconds
+DOMAIN_PENDING_CACHE_TTL = 60
+_VERIFIED_STATUSES = ('verified', 'success')
+
+
+def invalidate_domain_cache() -> None:
+    """Drop cached domain statuses, e.g. after the Resend settings change."""
+    with _domain_cache_lock:
+        _domain_status_cache.clear()
+
+
+class _DomainListError(Exception):
+    """Resend answered the domain listing with an error (e.g. a send-only key)."""
+
+
+def _get_domain_statuses(api_key: str, domain_key: str) -> Dict[str, Optional[str]]:
+    """Return the cached domain statuses for api_key, listing them from Resend when stale.
+
+    An error answer from Resend is cached for DOMAIN_PENDING_CACHE_TTL too and
+    re-raised, so a key that may only send costs one request per TTL.
+    """
+    with _domain_cache_lock:
+        cached = _domain_status_cache.get(api_key)
+        if cached:
+            fetched_at, statuses = cached
+            if isinstance(statuses, _DomainListError):
+                if time.monotonic() - fetched_at < DOMAIN_PENDING_CACHE_TTL:
+                    raise statuses
+            else:
+                ttl = DOMAIN_CACHE_TTL if statuses.get(domain_key) in _VERIFIED_STATUSES else DOMAIN_PENDING_CACHE_TTL
+                if time.monotonic() - fetched_at < ttl:
+                    return statuses
+        # Fetched under the lock so concurrent checks share one API call
+        try:
+            statuses = _fetch_domain_statuses(api_key)
+        except _DomainListError as exc:
+            _domain_status_cache[api_key] = (time.monotonic(), exc)
+            raise
+        _domain_status_cache[api_key] = (time.monotonic(), statuses)
+        return statuses
+
+
+def _fetch_domain_statuses(api_key: str) -> Dict[str, Optional[str]]:
+    """List the account's domains from Resend as {domain_name_lower: status}.
+
+    Uses a plain GET over the email queue's pooled session. A non-200 answer
+    raises _DomainListError carrying Resend's error message, so callers can
+    still tell a key that may only send from other failures.
+    """
+    # Imported on first use so loading this module doesn't pull in the email
+    # queue; neither module imports the Resend SDK up front
+    from app.utils.email_queue import _RESEND_API_URL, _RESEND_TIMEOUT, _get_resend_session
+
+    response = _get_resend_session().get(
+        f"{_RESEND_API_URL}/domains",
+        headers={"Authorization": f"Bearer {api_key}"},
+        timeout=_RESEND_TIMEOUT,
+    )
+    if response.status_code != 200:
+        try:
+            error = response.json() or {}
+        except ValueError:
+            error = {}
+        message = error.get('message') or response.text or 'no error message'
+        name = error.get('name')
+        raise _DomainListError(
+            f"Resend returned HTTP {response.status_code}: {message}" + (f" ({name})" if name else "")
+        )
+    domains_data = (response.json() or {}).get('data')
+    
+    statuses: Dict[str, Optional[str]] = {}
+    for domain_obj in domains_data or []:
+        # Each domain is a JSON object with a 'name' (or 'domain') and a status
+        domain_name = domain_obj.get('name') or domain_obj.get('domain')
+        status = domain_obj.get('status') or (domain_obj.get('verification', {}) or {}).get('status')
+        if domain_name:
+            statuses.setdefault(domain_name.lower(), status)
+    return statuses
 
 
 def is_domain_verified_in_resend(domain: str, api_key: Optional[str] = None) -> Tuple[bool, Optional[str], bool]:
@@ -46,61 +137,27 @@ def is_domain_verified_in_resend(domain: str, api_key: Optional[str] = None) ->
     if not domain:
         return False, "Domain is required", False
     
-    # Get API key if not provided
+    # Get API key if not provided (database settings or RESEND_API_KEY, read
+    # through the email queue's settings cache)
     if not api_key:
-        try:
-            from app import AppSettings
-            settings = AppSettings.query.first()
-            if settings and settings.resend_api_key:
-                api_key = settings.resend_api_key
-            else:
-                api_key = os.getenv("RESEND_API_KEY")
-        except Exception:
-            api_key = os.getenv("RESEND_API_KEY")
+        from app.utils.email_queue import get_email_settings
+        api_key = get_email_settings()[0]
     
     if not api_key:
         return False, "Resend API key is not configured", False
     
+    domain_key = domain.lower()
+    
     try:
-        # Configure Resend
-        resend.api_key = api_key
+        statuses = _get_domain_statuses(api_key, domain_key)
         
-        # List all domains from Resend
-        domains_response = resend.Domains.list()
-        
-        # Handle different response formats
-        domains_data = None
-        if hasattr(domains_response, 'data'):
-            domains_data = domains_response.data
-        elif isinstance(domains_response, dict) and 'data' in domains_response:
-            domains_data = domains_response['data']
-        elif isinstance(domains_response, list):
-            domains_data = domains_response
-        
-        # Check if the domain exists and is verified
-        if domains_data:
-            for domain_obj in domains_data:
-                # Domain object might be a dict or object with 'name' or 'domain' attribute
-                if isinstance(domain_obj, dict):
-                    domain_name = domain_obj.get('name') or domain_obj.get('domain')
-                    status = domain_obj.get('status') or (domain_obj.get('verification', {}) or {}).get('status')
-                else:
-                    domain_name = getattr(domain_obj, 'name', None) or getattr(domain_obj, 'domain', None)
-                    status = getattr(domain_obj, 'status', None)
-                    if not status:
-                        verification = getattr(domain_obj, 'verification', None)
-                        if verification:
-                            if isinstance(verification, dict):
-                                status = verification.get('status')
-                            else:
-                                status = getattr(verification, 'status', None)
-                
-                if domain_name and domain_name.lower() == domain.lower():
-                    # Check verification status - Resend uses 'verified' or 'success' status
-                    if status in ['verified', 'success']:
-                        return True, None, True
-                    else:
-                        return False, f"Domain {domain} exists but is not verified (status: {status or 'unknown'})", True
+        if domain_key in statuses:
+            status = statuses[domain_key]
+            # Check verification status - Resend uses 'verified' or 'success' status
+            if status in _VERIFIED_STATUSES:
+                return True, None, True
+            else:
+                return False, f"Domain {domain} exists but is not verified (status: {status or 'unknown'})", True
         
         # Domain not found in verified domains
         return False, f"Domain {domain} is not verified in Resend", True
@@ -3,14 +3,77 @@ WhatsApp Token Management Utility
 Handles dynamic token retrieval, validation, and .env file updates.
 """
 
+import hashlib
 import os
 import re
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Tuple, Dict, Any
 from flask import current_app
 from dotenv import load_dotenv, set_key, find_dotenv
 
 
+# Global session for Graph API requests, so repeated token checks reuse the
+# keep-alive connection instead of a new TCP/TLS handshake each time
+_graph_session: Optional[requests.Session] = None
+_graph_session_lock = threading.Lock()
+
+
+def _get_graph_session() -> requests.Session:
+    """Get or create the Graph API session, retrying GETs on transient 5xx."""
+    global _graph_session
+    if _graph_session is None:
+        with _graph_session_lock:
+            if _graph_session is None:
+                session = requests.Session()
+                retry_strategy = Retry(
+                    total=2,
+                    backoff_factor=0.2,
+                    status_forcelist=[502, 503, 504],
+                    allowed_methods=["GET"],
+                    raise_on_status=False,  # Return the last response so its error is parsed
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry_strategy)
+                session.mount("https://", adapter)
+                _graph_session = session
+    return _graph_session
+
+
+# WhatsApp settings cache (60 seconds TTL): (access_token, phone_number_id) as
+# stored in AppSettings, so sending a message doesn't query the database each time
+_WHATSAPP_SETTINGS_TTL = 60
+_whatsapp_settings_cache: Optional[Tuple[Optional[str], Optional[str]]] = None
+_whatsapp_settings_cache_time = 0.0
+
+
+def invalidate_whatsapp_settings_cache() -> None:
+    """Drop the cached WhatsApp settings; call after AppSettings is saved."""
+    global _whatsapp_settings_cache
+    _whatsapp_settings_cache = None
+
+
+def _get_db_whatsapp_settings() -> Tuple[Optional[str], Optional[str]]:
+    """Return (access_token, phone_number_id) from AppSettings, cached for _WHATSAPP_SETTINGS_TTL seconds."""
+    global _whatsapp_settings_cache, _whatsapp_settings_cache_time
+    cached = _whatsapp_settings_cache
+    if cached is not None and time.monotonic() - _whatsapp_settings_cache_time < _WHATSAPP_SETTINGS_TTL:
+        return cached
+    
+    from app import AppSettings
+    settings = AppSettings.query.first()
+    result = (settings.whatsapp_access_token, settings.whatsapp_phone_number_id) if settings else (None, None)
+    _whatsapp_settings_cache = result
+    _whatsapp_settings_cache_time = time.monotonic()
+    return result
+
+
+# Whether get_whatsapp_token() has loaded .env into os.environ yet
+_dotenv_loaded = False
+
+
 def get_whatsapp_token() -> Tuple[Optional[str], Optional[str]]:
     """
     Get WhatsApp access token and phone number ID dynamically.
@@ -20,21 +83,19 @@ def get_whatsapp_token() -> Tuple[Optional[str], Optional[str]]:
         Tuple of (access_token, phone_number_id)
     """
     try:
-        from app import AppSettings, db
-        settings = AppSettings.query.first()
-        
         # Try database first
-        if settings:
-            access_token = settings.whatsapp_access_token
-            phone_number_id = settings.whatsapp_phone_number_id
-            
-            if access_token and phone_number_id:
-                return access_token.strip(), phone_number_id.strip()
+        access_token, phone_number_id = _get_db_whatsapp_settings()
+        if access_token and phone_number_id:
+            return access_token.strip(), phone_number_id.strip()
     except Exception as e:
         current_app.logger.warning(f"Could not load WhatsApp token from database: {e}")
     
-    # Fallback to environment variables
-    load_dotenv(override=True)
+    # Fallback to environment variables. .env is read once per process;
+    # update_env_file() keeps os.environ in sync after that.
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv(override=True)
+        _dotenv_loaded = True
     access_token = os.getenv('WHATSAPP_ACCESS_TOKEN', '').strip()
     phone_number_id = os.getenv('WHATSAPP_PHONE_NUMBER_ID', '').strip()
     
@@ -70,7 +131,7 @@ def validate_whatsapp_token(access_token: str, phone_number_id: str) -> Tuple[bo
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _get_graph_session().get(url, headers=headers, timeout=10)
         response_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
         
         if response.status_code == 200:
@@ -120,14 +181,15 @@ def check_token_expiration_from_error(error_response: Dict[str, Any]) -> bool:
     # Check for error code 190 (OAuthException) which indicates expired token
     error_code = error_response.get('error_code')
     error_subcode = error_response.get('error_subcode')
-    message = error_response.get('message', '').lower()
     
     # Error code 190 = OAuthException (expired/invalid token)
     # Error subcode 463 = Session expired
-    if error_code == 190 or error_subcode == 463 or 'expired' in message or 'session has expired' in message:
+    if error_code == 190 or error_subcode == 463:
         return True
     
-    return False
+    # Only lowercase the message when the codes don't already decide it;
+    # 'expired' also covers "session has expired"
+    return 'expired' in (error_response.get('message') or '').lower()
 
 
 def update_env_file(key: str, value: str) -> bool:
@@ -177,6 +239,8 @@ def save_whatsapp_token_to_env(access_token: str, phone_number_id: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
+    invalidate_whatsapp_settings_cache()
+    invalidate_token_status_cache()
     success = True
     if access_token:
         success = update_env_file('WHATSAPP_ACCESS_TOKEN', access_token) and success
@@ -186,6 +250,35 @@ def save_whatsapp_token_to_env(access_token: str, phone_number_id: str) -> bool:
     return success
 
 
+# Recent validation results so dashboard polls don't hit the Graph API each time:
+# (sha1(access_token), phone_number_id) -> (checked_at, (is_valid, error_info))
+# Network failures are not cached.
+_token_status_cache: Dict[Tuple[str, str], Tuple[float, Tuple[bool, Optional[Dict[str, Any]]]]] = {}
+_token_status_lock = threading.Lock()
+TOKEN_STATUS_CACHE_TTL = 30  # seconds
+
+
+def invalidate_token_status_cache() -> None:
+    """Forget cached token validation results."""
+    with _token_status_lock:
+        _token_status_cache.clear()
+
+
+def _validate_whatsapp_token_cached(access_token: str, phone_number_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    cache_key = (hashlib.sha1(access_token.encode()).hexdigest(), phone_number_id)
+    with _token_status_lock:
+        cached = _token_status_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < TOKEN_STATUS_CACHE_TTL:
+        return cached[1]
+    
+    result = validate_whatsapp_token(access_token, phone_number_id)
+    error_info = result[1]
+    if not error_info or error_info.get('status_code') is not None:
+        with _token_status_lock:
+            _token_status_cache[cache_key] = (time.monotonic(), result)
+    return result
+
+
 def get_token_status() -> Dict[str, Any]:
     """
     Get current WhatsApp token status including validation.
@@ -213,8 +306,8 @@ def get_token_status() -> Dict[str, Any]:
     if not status['configured']:
         return status
     
-    # Validate the token
-    is_valid, error_info = validate_whatsapp_token(access_token, phone_number_id)
+    # Validate the token (cached for TOKEN_STATUS_CACHE_TTL seconds)
+    is_valid, error_info = _validate_whatsapp_token_cached(access_token, phone_number_id)
     status['is_valid'] = is_valid
     
     if error_info:
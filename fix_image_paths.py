@@ -14,15 +14,25 @@ It handles various existing path formats:
 """
 
 import os
+import re
 import sys
 from pathlib import Path
 
+from sqlalchemy import bindparam, update
+
 # Add the parent directory to the path so we can import the app
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app import create_app, db
 from app import Product
 
+# Rows per executemany UPDATE when writing fixed paths
+UPDATE_BATCH_SIZE = 1000
+
+# 'products/', 'uploads/products/' or 'static/uploads/products/', optionally
+# after a leading slash
+_PRODUCTS_PREFIX_RE = re.compile(r'^/?(?:(?:static/)?uploads/)?products/')
+
 def normalize_image_path(path):
     """
     Normalize image path to 'uploads/products/{filename}' format.
@@ -43,48 +53,50 @@ def normalize_image_path(path):
     if not path:
         return None
     
-    # Remove leading slash if present
-    if path.startswith('/'):
-        path = path[1:]
-    
-    # Handle different path formats
-    if path.startswith('static/uploads/products/'):
-        # Remove 'static/' prefix
-        path = path.replace('static/', '', 1)
-    elif path.startswith('uploads/products/'):
-        # Already in correct format
-        pass
-    elif path.startswith('products/'):
-        # Add 'uploads/' prefix
-        path = f'uploads/{path}'
-    elif path.startswith('/static/uploads/products/'):
-        # Remove leading slash and 'static/' prefix
-        path = path.replace('/static/', '', 1)
-    else:
-        # If it's just a filename, assume it's in products folder
-        if '/' not in path:
-            path = f'uploads/products/{path}'
-        # Otherwise, try to extract filename and rebuild path
-        else:
-            filename = os.path.basename(path)
-            path = f'uploads/products/{filename}'
+    # Known products prefixes are swapped for 'uploads/products/' in one pass;
+    # anything after them (including subfolders) is kept
+    relative_path, matched = _PRODUCTS_PREFIX_RE.subn('', path, count=1)
+    if not matched:
+        # Just a filename, or some other folder: keep only the filename
+        relative_path = os.path.basename(relative_path)
     
-    return path
+    return f'uploads/products/{relative_path}'
 
 def fix_product_image_paths():
     """Fix all product image paths in the database."""
     app = create_app()
     
     with app.app_context():
-        # Get all products
-        products = Product.query.all()
+        # Only the columns used here are loaded, so no Product objects are
+        # built or change-tracked. Rows without an image or already in
+        # 'uploads/products/...' form are left out by the database.
+        products = (
+            db.session.query(Product.id, Product.name, Product.image)
+            .filter(
+                Product.image.isnot(None),
+                Product.image != '',
+                ~Product.image.like('uploads/products/%'),
+            )
+            .all()
+        )
         
-        print(f"Found {len(products)} products in database")
+        print(f"Found {len(products)} products with image paths to check")
         print("-" * 60)
         
         fixed_count = 0
         skipped_count = 0
         error_count = 0
+        # New paths are collected and written with one executemany UPDATE
+        updates = []
+        
+        # One directory listing instead of a stat() per product
+        static_folder = app.static_folder
+        products_dir = os.path.join(static_folder, 'uploads', 'products')
+        try:
+            with os.scandir(products_dir) as entries:
+                existing_files = {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            existing_files = set()
         
         for product in products:
             if not product.image:
@@ -97,11 +109,15 @@ def fix_product_image_paths():
             if normalized_path != original_path:
                 try:
                     # Verify the file exists
-                    static_folder = app.static_folder
                     full_path = os.path.join(static_folder, normalized_path)
+                    directory, filename = os.path.split(normalized_path)
+                    if directory == 'uploads/products':
+                        file_exists = filename in existing_files
+                    else:
+                        file_exists = os.path.exists(full_path)
                     
-                    if os.path.exists(full_path):
-                        product.image = normalized_path
+                    if file_exists:
+                        updates.append({'product_id': product.id, 'new_image': normalized_path})
                         fixed_count += 1
                         print(f"✓ Fixed: {product.name}")
                         print(f"  Old: {original_path}")
@@ -111,7 +127,7 @@ def fix_product_image_paths():
                         old_full_path = os.path.join(static_folder, original_path.lstrip('/'))
                         if os.path.exists(old_full_path):
                             # File exists with old path, update DB anyway
-                            product.image = normalized_path
+                            updates.append({'product_id': product.id, 'new_image': normalized_path})
                             fixed_count += 1
                             print(f"✓ Fixed (path updated, file may need moving): {product.name}")
                             print(f"  Old: {original_path}")
@@ -129,8 +145,17 @@ def fix_product_image_paths():
                 skipped_count += 1
         
         # Commit all changes
-        if fixed_count > 0:
+        if updates:
             try:
+                table = Product.__table__
+                statement = (
+                    update(table)
+                    .where(table.c.id == bindparam('product_id'))
+                    .values(image=bindparam('new_image'))
+                )
+                # All batches share one transaction
+                for start in range(0, len(updates), UPDATE_BATCH_SIZE):
+                    db.session.execute(statement, updates[start:start + UPDATE_BATCH_SIZE])
                 db.session.commit()
                 print("-" * 60)
                 print(f"✓ Successfully fixed {fixed_count} product image paths")
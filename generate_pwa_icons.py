@@ -6,6 +6,7 @@ import requests
 from PIL import Image
 import io
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Cloudinary image URL
 IMAGE_URL = "https://res.cloudinary.com/dfjffnmzf/image/upload/v1763661285/Tech_Buxin_is_your_gateway_to_the_future_of_technology._Whether_you_re_a_student_teacher_or_tech_enthusiast_our_app_helps_you_explore_the_exciting_world_of_robotics_coding_and_artificial_inte_dkohh9.png"
@@ -16,6 +17,15 @@ ICON_SIZES = [72, 96, 128, 192, 256, 512]
 # Output directory
 OUTPUT_DIR = "app/static/icons"
 
+def _save_icon(img, size):
+    """Resize the square master image to size x size and save it as PNG and WebP icons"""
+    img_resized = img.resize((size, size), Image.Resampling.LANCZOS)
+    output_path = os.path.join(OUTPUT_DIR, f"icon-{size}.png")
+    img_resized.save(output_path, "PNG", optimize=True)
+    # Smaller WebP copy for clients that accept it; the PNG stays the fallback
+    img_resized.save(os.path.join(OUTPUT_DIR, f"icon-{size}.webp"), "WEBP", quality=90, method=6)
+    return output_path
+
 def generate_icons():
     """Download image and generate PWA icons"""
     print(f"Downloading image from: {IMAGE_URL}")
@@ -42,31 +52,34 @@ def generate_icons():
         # Ensure output directory exists
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         
-        # Generate icons for each size
-        for size in ICON_SIZES:
-            # Resize image maintaining aspect ratio, then crop to square
-            img_copy = img.copy()
-            
-            # Calculate dimensions to maintain aspect ratio and fill square
-            width, height = img_copy.size
-            if width > height:
-                # Landscape: crop width
-                left = (width - height) // 2
-                img_copy = img_copy.crop((left, 0, left + height, height))
-            elif height > width:
-                # Portrait: crop height
-                top = (height - width) // 2
-                img_copy = img_copy.crop((0, top, width, top + width))
-            
-            # Resize to target size
-            img_resized = img_copy.resize((size, size), Image.Resampling.LANCZOS)
-            
-            # Save icon
-            output_path = os.path.join(OUTPUT_DIR, f"icon-{size}.png")
-            img_resized.save(output_path, "PNG", optimize=True)
-            print(f"[OK] Generated: {output_path} ({size}x{size})")
+        # Crop to a centered square once; every size is resized from it
+        width, height = img.size
+        if width > height:
+            # Landscape: crop width
+            left = (width - height) // 2
+            img = img.crop((left, 0, left + height, height))
+        elif height > width:
+            # Portrait: crop height
+            top = (height - width) // 2
+            img = img.crop((0, top, width, top + width))
+        
+        # Downsample the (often multi-megapixel) master to the largest icon
+        # size once; smaller icons are resampled from that instead of the
+        # full-resolution image
+        largest = max(ICON_SIZES)
+        if img.size[0] > largest:
+            img = img.resize((largest, largest), Image.Resampling.LANCZOS)
+        img.load()
+        
+        # Generate icons for each size in parallel. Pillow releases the GIL
+        # while resampling and compressing, so threads use several cores
+        # without copying the image into worker processes.
+        with ThreadPoolExecutor(max_workers=min(len(ICON_SIZES), os.cpu_count() or 1)) as executor:
+            output_paths = executor.map(_save_icon, [img] * len(ICON_SIZES), ICON_SIZES)
+            for size, output_path in zip(ICON_SIZES, output_paths):
+                print(f"[OK] Generated: {output_path} (+ .webp) ({size}x{size})")
         
-        print(f"\n[SUCCESS] Successfully generated {len(ICON_SIZES)} icon files in {OUTPUT_DIR}/")
+        print(f"\n[SUCCESS] Successfully generated {len(ICON_SIZES)} icon sizes (PNG + WebP) in {OUTPUT_DIR}/")
         return True
         
     except Exception as e:
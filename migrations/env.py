@@ -64,7 +64,12 @@ def run_migrations_online() -> None:
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+        # A single pooled connection: migrations still run serially, but a
+        # reconnect reuses it instead of opening a new TCP/TLS session
+        poolclass=pool.QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_recycle=3600,
     )
 
     with connectable.connect() as connection:
@@ -0,0 +1,27 @@
+"""Shared DDL helpers for the Alembic revisions in migrations/versions."""
+from alembic import op
+from sqlalchemy.schema import CreateColumn
+
+
+def add_columns(table_name: str, columns) -> None:
+    """Add columns with a single ALTER TABLE where the dialect allows it."""
+    dialect = op.get_context().dialect
+    if dialect.name == 'sqlite':
+        # SQLite takes one ADD COLUMN per ALTER TABLE
+        for column in columns:
+            op.add_column(table_name, column)
+        return
+    clauses = ", ".join(f"ADD COLUMN {CreateColumn(column).compile(dialect=dialect)}" for column in columns)
+    op.execute(f"ALTER TABLE {dialect.identifier_preparer.quote(table_name)} {clauses}")
+
+
+def drop_columns(table_name: str, column_names) -> None:
+    """Drop columns with a single ALTER TABLE where the dialect allows it."""
+    dialect = op.get_context().dialect
+    if dialect.name == 'sqlite':
+        for column_name in column_names:
+            op.drop_column(table_name, column_name)
+        return
+    quote = dialect.identifier_preparer.quote
+    clauses = ", ".join(f"DROP COLUMN {quote(column_name)}" for column_name in column_names)
+    op.execute(f"ALTER TABLE {quote(table_name)} {clauses}")
@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_columns, drop_columns
+
 
 # revision identifiers, used by Alembic.
 revision: str = '02dd8f60678c'
@@ -20,10 +22,12 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     # Add new Resend API fields to app_settings table
-    op.add_column('app_settings', sa.Column('resend_api_key', sa.String(length=255), nullable=True))
-    op.add_column('app_settings', sa.Column('resend_from_email', sa.String(length=255), nullable=True))
-    op.add_column('app_settings', sa.Column('resend_default_recipient', sa.String(length=255), nullable=True))
-    op.add_column('app_settings', sa.Column('resend_enabled', sa.Boolean(), nullable=True, server_default='true'))
+    add_columns('app_settings', [
+        sa.Column('resend_api_key', sa.String(length=255), nullable=True),
+        sa.Column('resend_from_email', sa.String(length=255), nullable=True),
+        sa.Column('resend_default_recipient', sa.String(length=255), nullable=True),
+        sa.Column('resend_enabled', sa.Boolean(), nullable=True, server_default='true'),
+    ])
     
     # Migrate data from old from_email to resend_from_email if it exists
     # Note: This assumes from_email column exists (from previous migration)
@@ -36,7 +40,4 @@ def upgrade() -> None:
 
 def downgrade() -> None:
     # Remove Resend API fields from app_settings table
-    op.drop_column('app_settings', 'resend_enabled')
-    op.drop_column('app_settings', 'resend_default_recipient')
-    op.drop_column('app_settings', 'resend_from_email')
-    op.drop_column('app_settings', 'resend_api_key')
+    drop_columns('app_settings', ['resend_enabled', 'resend_default_recipient', 'resend_from_email', 'resend_api_key'])
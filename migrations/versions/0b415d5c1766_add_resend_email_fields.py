@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_columns, drop_columns
+
 
 # revision identifiers, used by Alembic.
 revision: str = '0b415d5c1766'
@@ -20,13 +22,13 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     # Add Resend email settings fields to app_settings table
-    op.add_column('app_settings', sa.Column('from_email', sa.String(length=255), nullable=True))
-    op.add_column('app_settings', sa.Column('contact_email', sa.String(length=255), nullable=True))
-    op.add_column('app_settings', sa.Column('default_subject_prefix', sa.String(length=100), nullable=True))
+    add_columns('app_settings', [
+        sa.Column('from_email', sa.String(length=255), nullable=True),
+        sa.Column('contact_email', sa.String(length=255), nullable=True),
+        sa.Column('default_subject_prefix', sa.String(length=100), nullable=True),
+    ])
 
 
 def downgrade() -> None:
     # Remove Resend email settings fields from app_settings table
-    op.drop_column('app_settings', 'default_subject_prefix')
-    op.drop_column('app_settings', 'contact_email')
-    op.drop_column('app_settings', 'from_email')
+    drop_columns('app_settings', ['default_subject_prefix', 'contact_email', 'from_email'])
@@ -18,71 +18,46 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
-def upgrade() -> None:
-    # Rename shipping_method to shipping_mode_key in order table
-    op.alter_column('order', 'shipping_method',
-                    new_column_name='shipping_mode_key',
+def _rename_column(table_name: str, old_name: str, new_name: str) -> None:
+    """Rename a String(20) column, as a metadata-only change where possible."""
+    dialect = op.get_context().dialect
+    if dialect.name == 'mysql':
+        # Alembic emits CHANGE COLUMN on MySQL; RENAME COLUMN (8.0+) never
+        # copies the table
+        quote = dialect.identifier_preparer.quote
+        op.execute(f"ALTER TABLE {quote(table_name)} RENAME COLUMN {quote(old_name)} TO {quote(new_name)}")
+        return
+    op.alter_column(table_name, old_name,
+                    new_column_name=new_name,
                     existing_type=sa.String(length=20),
                     existing_nullable=True)
+
+
+def upgrade() -> None:
+    # Rename shipping_method to shipping_mode_key in order table
+    _rename_column('order', 'shipping_method', 'shipping_mode_key')
     
     # Rename shipping_method to shipping_mode_key in pending_payments table
-    op.alter_column('pending_payments', 'shipping_method',
-                    new_column_name='shipping_mode_key',
-                    existing_type=sa.String(length=20),
-                    existing_nullable=True)
+    _rename_column('pending_payments', 'shipping_method', 'shipping_mode_key')
     
     # Rename shipping_method to shipping_mode_key in shipping_rule table (LegacyShippingRule)
-    op.alter_column('shipping_rule', 'shipping_method',
-                    new_column_name='shipping_mode_key',
-                    existing_type=sa.String(length=20),
-                    existing_nullable=True)
+    _rename_column('shipping_rule', 'shipping_method', 'shipping_mode_key')
     
     # Rename the index if it exists (PostgreSQL)
-    op.execute("""
-        DO $$
-        BEGIN
-            IF EXISTS (
-                SELECT 1 FROM pg_indexes 
-                WHERE indexname = 'ix_shipping_rule_shipping_method' 
-                AND tablename = 'shipping_rule'
-            ) THEN
-                ALTER INDEX ix_shipping_rule_shipping_method 
-                RENAME TO ix_shipping_rule_shipping_mode_key;
-            END IF;
-        END $$;
-    """)
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute("ALTER INDEX IF EXISTS ix_shipping_rule_shipping_method RENAME TO ix_shipping_rule_shipping_mode_key")
 
 
 def downgrade() -> None:
     # Rename shipping_mode_key back to shipping_method in order table
-    op.alter_column('order', 'shipping_mode_key',
-                    new_column_name='shipping_method',
-                    existing_type=sa.String(length=20),
-                    existing_nullable=True)
+    _rename_column('order', 'shipping_mode_key', 'shipping_method')
     
     # Rename shipping_mode_key back to shipping_method in pending_payments table
-    op.alter_column('pending_payments', 'shipping_mode_key',
-                    new_column_name='shipping_method',
-                    existing_type=sa.String(length=20),
-                    existing_nullable=True)
+    _rename_column('pending_payments', 'shipping_mode_key', 'shipping_method')
     
     # Rename shipping_mode_key back to shipping_method in shipping_rule table
-    op.alter_column('shipping_rule', 'shipping_mode_key',
-                    new_column_name='shipping_method',
-                    existing_type=sa.String(length=20),
-                    existing_nullable=True)
+    _rename_column('shipping_rule', 'shipping_mode_key', 'shipping_method')
     
     # Rename the index back (PostgreSQL)
-    op.execute("""
-        DO $$
-        BEGIN
-            IF EXISTS (
-                SELECT 1 FROM pg_indexes 
-                WHERE indexname = 'ix_shipping_rule_shipping_mode_key' 
-                AND tablename = 'shipping_rule'
-            ) THEN
-                ALTER INDEX ix_shipping_rule_shipping_mode_key 
-                RENAME TO ix_shipping_rule_shipping_method;
-            END IF;
-        END $$;
-    """)
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute("ALTER INDEX IF EXISTS ix_shipping_rule_shipping_mode_key RENAME TO ix_shipping_rule_shipping_method")
@@ -45,23 +45,28 @@ def upgrade() -> None:
     op.create_index('ix_pending_payments_user_id', 'pending_payments', ['user_id'])
     op.create_index('ix_pending_payments_modempay_transaction_id', 'pending_payments', ['modempay_transaction_id'])
     
-    # Add pending_payment_id column to payments table (nullable for backward compatibility)
-    op.add_column('payments', sa.Column('pending_payment_id', sa.Integer(), nullable=True))
-    op.create_foreign_key('fk_payments_pending_payment_id', 'payments', 'pending_payments', ['pending_payment_id'], ['id'])
-    op.create_index('ix_payments_pending_payment_id', 'payments', ['pending_payment_id'])
-    
-    # Make order_id nullable in payments table (for pending payments that haven't been converted yet)
-    op.alter_column('payments', 'order_id', nullable=True)
+    # All payments changes go through one batch: on SQLite, which can't add a
+    # foreign key or change nullability in place, that is a single table
+    # rebuild; other databases get the usual ALTER statements
+    with op.batch_alter_table('payments') as batch_op:
+        # Add pending_payment_id column to payments table (nullable for backward compatibility)
+        batch_op.add_column(sa.Column('pending_payment_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_payments_pending_payment_id', 'pending_payments', ['pending_payment_id'], ['id'])
+        batch_op.create_index('ix_payments_pending_payment_id', ['pending_payment_id'])
+        
+        # Make order_id nullable in payments table (for pending payments that haven't been converted yet)
+        batch_op.alter_column('order_id', nullable=True)
 
 
 def downgrade() -> None:
-    # Drop indexes and foreign key for payments table
-    op.drop_index('ix_payments_pending_payment_id', table_name='payments')
-    op.drop_constraint('fk_payments_pending_payment_id', 'payments', type_='foreignkey')
-    op.drop_column('payments', 'pending_payment_id')
-    
-    # Revert order_id to NOT NULL (may fail if there are NULL values)
-    op.alter_column('payments', 'order_id', nullable=False)
+    with op.batch_alter_table('payments') as batch_op:
+        # Drop indexes and foreign key for payments table
+        batch_op.drop_index('ix_payments_pending_payment_id')
+        batch_op.drop_constraint('fk_payments_pending_payment_id', type_='foreignkey')
+        batch_op.drop_column('pending_payment_id')
+        
+        # Revert order_id to NOT NULL (may fail if there are NULL values)
+        batch_op.alter_column('order_id', nullable=False)
     
     # Drop indexes
     op.drop_index('ix_pending_payments_modempay_transaction_id', table_name='pending_payments')
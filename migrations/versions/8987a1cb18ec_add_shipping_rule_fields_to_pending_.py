@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_columns, drop_columns
+
 
 # revision identifiers, used by Alembic.
 revision: str = '8987a1cb18ec'
@@ -19,19 +21,54 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
+    columns = [
+        sa.Column('shipping_rule_id', sa.Integer(), nullable=True),
+        sa.Column('shipping_delivery_estimate', sa.String(length=100), nullable=True),
+        sa.Column('shipping_display_currency', sa.String(length=10), nullable=True),
+    ]
+
+    dialect = op.get_context().dialect.name
+
+    if dialect == 'sqlite':
+        # SQLite can't add a foreign key in place, so do the columns, the
+        # foreign key and the index in a single table rebuild
+        with op.batch_alter_table('pending_payments') as batch_op:
+            for column in columns:
+                batch_op.add_column(column)
+            batch_op.create_foreign_key('fk_pending_payment_shipping_rule', 'shipping_rule', ['shipping_rule_id'], ['id'])
+            batch_op.create_index('ix_pending_payments_shipping_rule_id', ['shipping_rule_id'])
+        return
+
     # Add shipping rule fields to pending_payments table
-    op.add_column('pending_payments', sa.Column('shipping_rule_id', sa.Integer(), nullable=True))
-    op.add_column('pending_payments', sa.Column('shipping_delivery_estimate', sa.String(length=100), nullable=True))
-    op.add_column('pending_payments', sa.Column('shipping_display_currency', sa.String(length=10), nullable=True))
-    
-    # Add foreign key constraint for shipping_rule_id
-    op.create_foreign_key('fk_pending_payment_shipping_rule', 'pending_payments', 'shipping_rule', ['shipping_rule_id'], ['id'])
+    add_columns('pending_payments', columns)
     
-    # Create index for shipping_rule_id in pending_payments table
-    op.create_index('ix_pending_payments_shipping_rule_id', 'pending_payments', ['shipping_rule_id'])
+    # Create the index for shipping_rule_id before its foreign key, so the
+    # constraint never exists without an index behind it
+    if dialect == 'mysql':
+        # One table reorganization for both; InnoDB picks up the index for the FK
+        op.execute(
+            'ALTER TABLE pending_payments '
+            'ADD INDEX ix_pending_payments_shipping_rule_id (shipping_rule_id), '
+            'ADD CONSTRAINT fk_pending_payment_shipping_rule '
+            'FOREIGN KEY (shipping_rule_id) REFERENCES shipping_rule (id)'
+        )
+    else:
+        # The column was only just added and is all NULL, so neither step has
+        # data to scan; both stay in the revision's transaction
+        op.create_index('ix_pending_payments_shipping_rule_id', 'pending_payments', ['shipping_rule_id'])
+        op.create_foreign_key('fk_pending_payment_shipping_rule', 'pending_payments', 'shipping_rule',
+                              ['shipping_rule_id'], ['id'])
 
 
 def downgrade() -> None:
+    if op.get_context().dialect.name == 'sqlite':
+        with op.batch_alter_table('pending_payments') as batch_op:
+            batch_op.drop_index('ix_pending_payments_shipping_rule_id')
+            batch_op.drop_constraint('fk_pending_payment_shipping_rule', type_='foreignkey')
+            for name in ('shipping_display_currency', 'shipping_delivery_estimate', 'shipping_rule_id'):
+                batch_op.drop_column(name)
+        return
+
     # Drop index
     op.drop_index('ix_pending_payments_shipping_rule_id', table_name='pending_payments')
     
@@ -39,6 +76,4 @@ def downgrade() -> None:
     op.drop_constraint('fk_pending_payment_shipping_rule', 'pending_payments', type_='foreignkey')
     
     # Drop columns from pending_payments table
-    op.drop_column('pending_payments', 'shipping_display_currency')
-    op.drop_column('pending_payments', 'shipping_delivery_estimate')
-    op.drop_column('pending_payments', 'shipping_rule_id')
+    drop_columns('pending_payments', ['shipping_display_currency', 'shipping_delivery_estimate', 'shipping_rule_id'])
@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_columns, drop_columns
+
 
 # revision identifiers, used by Alembic.
 revision: str = 'c412400b3979'
@@ -20,11 +22,12 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     # Add contact receiver fields to app_settings table
-    op.add_column('app_settings', sa.Column('contact_whatsapp_receiver', sa.String(length=50), nullable=True))
-    op.add_column('app_settings', sa.Column('contact_email_receiver', sa.String(length=255), nullable=True))
+    add_columns('app_settings', [
+        sa.Column('contact_whatsapp_receiver', sa.String(length=50), nullable=True),
+        sa.Column('contact_email_receiver', sa.String(length=255), nullable=True),
+    ])
 
 
 def downgrade() -> None:
     # Remove contact receiver fields from app_settings table
-    op.drop_column('app_settings', 'contact_email_receiver')
-    op.drop_column('app_settings', 'contact_whatsapp_receiver')
+    drop_columns('app_settings', ['contact_email_receiver', 'contact_whatsapp_receiver'])
@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from migrations.helpers import add_columns, drop_columns
+
 
 # revision identifiers, used by Alembic.
 revision: str = 'd22be032641d'
@@ -20,24 +22,21 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     # Add default communication receiver fields to app_settings table
-    op.add_column('app_settings', sa.Column('whatsapp_receiver', sa.String(length=50), nullable=True, server_default='+2200000000'))
-    op.add_column('app_settings', sa.Column('email_receiver', sa.String(length=255), nullable=True, server_default='buxinstore9@gmail.com'))
+    add_columns('app_settings', [
+        sa.Column('whatsapp_receiver', sa.String(length=50), nullable=True, server_default='+2200000000'),
+        sa.Column('email_receiver', sa.String(length=255), nullable=True, server_default='buxinstore9@gmail.com'),
+    ])
     
     # Migrate data from old contact receivers to new default receivers if they exist
+    # One pass fills both columns; COALESCE keeps a value that is already set
     op.execute("""
         UPDATE app_settings 
-        SET whatsapp_receiver = COALESCE(whatsapp_receiver, contact_whatsapp_receiver, '+2200000000')
-        WHERE whatsapp_receiver IS NULL
-    """)
-    
-    op.execute("""
-        UPDATE app_settings 
-        SET email_receiver = COALESCE(email_receiver, contact_email_receiver, 'buxinstore9@gmail.com')
-        WHERE email_receiver IS NULL
+        SET whatsapp_receiver = COALESCE(whatsapp_receiver, contact_whatsapp_receiver, '+2200000000'),
+            email_receiver = COALESCE(email_receiver, contact_email_receiver, 'buxinstore9@gmail.com')
+        WHERE whatsapp_receiver IS NULL OR email_receiver IS NULL
     """)
 
 
 def downgrade() -> None:
     # Remove default communication receiver fields from app_settings table
-    op.drop_column('app_settings', 'email_receiver')
-    op.drop_column('app_settings', 'whatsapp_receiver')
+    drop_columns('app_settings', ['email_receiver', 'whatsapp_receiver'])
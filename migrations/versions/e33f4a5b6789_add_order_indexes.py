@@ -5,6 +5,7 @@ Revises: d22be032641d
 Create Date: 2025-01-20 14:00:00.000000
 
 """
+from contextlib import nullcontext
 from typing import Sequence, Union
 
 from alembic import op
@@ -20,19 +21,29 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     # Add indexes for optimized queries on Order table
-    # Index on status column for filtering paid/completed orders
-    op.create_index('idx_orders_status', 'order', ['status'], unique=False)
-    
-    # Index on created_at column for date range filtering
-    op.create_index('idx_orders_created_at', 'order', ['created_at'], unique=False)
-    
-    # Composite index on status and created_at for combined filtering
-    op.create_index('idx_orders_status_created', 'order', ['status', 'created_at'], unique=False)
+    context = op.get_context()
+    # On PostgreSQL build them CONCURRENTLY, outside the migration transaction,
+    # so the populated "order" table keeps accepting writes meanwhile
+    concurrently = context.dialect.name == 'postgresql'
+    with context.autocommit_block() if concurrently else nullcontext():
+        # Index on status column for filtering paid/completed orders
+        op.create_index('idx_orders_status', 'order', ['status'], unique=False,
+                        postgresql_concurrently=concurrently)
+        
+        # Index on created_at column for date range filtering
+        op.create_index('idx_orders_created_at', 'order', ['created_at'], unique=False,
+                        postgresql_concurrently=concurrently)
+        
+        # Composite index on status and created_at for combined filtering
+        op.create_index('idx_orders_status_created', 'order', ['status', 'created_at'], unique=False,
+                        postgresql_concurrently=concurrently)
 
 
 def downgrade() -> None:
     # Remove indexes
-    op.drop_index('idx_orders_status_created', table_name='order')
-    op.drop_index('idx_orders_created_at', table_name='order')
-    op.drop_index('idx_orders_status', table_name='order')
-
+    context = op.get_context()
+    concurrently = context.dialect.name == 'postgresql'
+    with context.autocommit_block() if concurrently else nullcontext():
+        op.drop_index('idx_orders_status_created', table_name='order', postgresql_concurrently=concurrently)
+        op.drop_index('idx_orders_created_at', table_name='order', postgresql_concurrently=concurrently)
+        op.drop_index('idx_orders_status', table_name='order', postgresql_concurrently=concurrently)
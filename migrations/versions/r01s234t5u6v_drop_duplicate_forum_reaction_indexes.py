@@ -0,0 +1,30 @@
+"""drop duplicate forum_reaction indexes
+
+Revision ID: r01s234t5u6v
+Revises: q00r123s4t5u
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'r01s234t5u6v'
+down_revision: Union[str, None] = 'q00r123s4t5u'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # uq_user_post_reaction and uq_user_comment_reaction already index the
+    # same columns in the same order, so these only slow down reaction inserts
+    op.drop_index('idx_forum_reaction_user_post', table_name='forum_reaction', if_exists=True)
+    op.drop_index('idx_forum_reaction_user_comment', table_name='forum_reaction', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('idx_forum_reaction_user_comment', 'forum_reaction', ['user_id', 'comment_id'], unique=False)
+    op.create_index('idx_forum_reaction_user_post', 'forum_reaction', ['user_id', 'post_id'], unique=False)
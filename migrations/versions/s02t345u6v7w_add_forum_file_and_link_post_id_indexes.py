@@ -0,0 +1,41 @@
+"""add forum_file and forum_link post_id indexes
+
+Revision ID: s02t345u6v7w
+Revises: r01s234t5u6v
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 's02t345u6v7w'
+down_revision: Union[str, None] = 'r01s234t5u6v'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Foreign keys aren't indexed automatically; these serve loading a post's
+    # files and links
+    context = op.get_context()
+    # On PostgreSQL build them CONCURRENTLY, outside the migration transaction,
+    # so the populated tables keep accepting writes meanwhile
+    concurrently = context.dialect.name == 'postgresql'
+    with context.autocommit_block() if concurrently else nullcontext():
+        op.create_index('idx_forum_file_post_id', 'forum_file', ['post_id'], unique=False,
+                        postgresql_concurrently=concurrently)
+        op.create_index('idx_forum_link_post_id', 'forum_link', ['post_id'], unique=False,
+                        postgresql_concurrently=concurrently)
+
+
+def downgrade() -> None:
+    context = op.get_context()
+    concurrently = context.dialect.name == 'postgresql'
+    with context.autocommit_block() if concurrently else nullcontext():
+        op.drop_index('idx_forum_link_post_id', table_name='forum_link', postgresql_concurrently=concurrently)
+        op.drop_index('idx_forum_file_post_id', table_name='forum_file', postgresql_concurrently=concurrently)
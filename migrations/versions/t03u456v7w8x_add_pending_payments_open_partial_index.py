@@ -0,0 +1,46 @@
+"""add partial index on open pending_payments
+
+Revision ID: t03u456v7w8x
+Revises: s02t345u6v7w
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 't03u456v7w8x'
+down_revision: Union[str, None] = 's02t345u6v7w'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Completed pending payments pile up forever, while only waiting/failed
+    # ones are ever listed (newest first) or counted. On PostgreSQL index just
+    # those rows, by created_at, in place of the full status index. Both are
+    # built/dropped CONCURRENTLY, outside the migration transaction, so
+    # checkout keeps writing to the table meanwhile.
+    context = op.get_context()
+    if context.dialect.name != 'postgresql':
+        return
+    with context.autocommit_block():
+        op.create_index('ix_pending_payments_open_created_at', 'pending_payments', ['created_at'],
+                        postgresql_where=sa.text("status IN ('waiting', 'failed')"),
+                        postgresql_concurrently=True)
+        op.drop_index('ix_pending_payments_status', table_name='pending_payments',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    context = op.get_context()
+    if context.dialect.name != 'postgresql':
+        return
+    with context.autocommit_block():
+        op.create_index('ix_pending_payments_status', 'pending_payments', ['status'],
+                        postgresql_concurrently=True)
+        op.drop_index('ix_pending_payments_open_created_at', table_name='pending_payments',
+                      postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""replace pending_payments user_id index with (user_id, status)
+
+Revision ID: u04v567w8x9y
+Revises: t03u456v7w8x
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'u04v567w8x9y'
+down_revision: Union[str, None] = 't03u456v7w8x'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A user's pending payments in a given state are found from the index
+    # alone; the leading user_id still serves user-only lookups, so the
+    # single-column index goes once the composite one exists
+    context = op.get_context()
+    # On PostgreSQL build/drop them CONCURRENTLY, outside the migration
+    # transaction, so the populated table keeps accepting writes meanwhile
+    concurrently = context.dialect.name == 'postgresql'
+    with context.autocommit_block() if concurrently else nullcontext():
+        op.create_index('ix_pending_payments_user_status', 'pending_payments', ['user_id', 'status'],
+                        postgresql_concurrently=concurrently)
+        op.drop_index('ix_pending_payments_user_id', table_name='pending_payments',
+                      postgresql_concurrently=concurrently)
+
+
+def downgrade() -> None:
+    context = op.get_context()
+    concurrently = context.dialect.name == 'postgresql'
+    with context.autocommit_block() if concurrently else nullcontext():
+        op.create_index('ix_pending_payments_user_id', 'pending_payments', ['user_id'],
+                        postgresql_concurrently=concurrently)
+        op.drop_index('ix_pending_payments_user_status', table_name='pending_payments',
+                      postgresql_concurrently=concurrently)